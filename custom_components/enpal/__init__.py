@@ -2,19 +2,79 @@
 import asyncio
 import logging
 
+import aiohttp
 from homeassistant import config_entries, core
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.helpers.storage import Store
 
-from .const import DOMAIN
+from .const import DOMAIN, STORAGE_KEY, STORAGE_VERSION
+from .sensor import EnpalCoordinator, create_session
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@core.callback
+def _shared_session(hass: core.HomeAssistant) -> aiohttp.ClientSession:
+    """Return the integration‑wide session, creating it on first use.
+
+    ``async_unload_entry`` closes it once the last Config Entry is gone, and
+    ``async_setup`` registers a close on Home Assistant shutdown.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    session = domain_data.get("session")
+    if session is None or session.closed:
+        session = domain_data["session"] = create_session(
+            limit=4, keepalive_timeout=300
+        )
+    return session
+
+
+async def _async_close_session(hass: core.HomeAssistant) -> None:
+    """Close the shared HTTP session, if one is open."""
+    session = hass.data.get(DOMAIN, {}).pop("session", None)
+    if session is not None:
+        await session.close()
+
+
+# hass.data key of the per‑entry snapshot stores (kept across reloads).
+_SNAPSHOT_STORES = f"{DOMAIN}_snapshot_stores"
+
+
+@core.callback
+def _snapshot_store(hass: core.HomeAssistant, entry_id: str) -> Store:
+    """Return the entry's snapshot store; setup, unload and removal share it."""
+    stores = hass.data.setdefault(_SNAPSHOT_STORES, {})
+    store = stores.get(entry_id)
+    if store is None:
+        store = stores[entry_id] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry_id)
+        )
+    return store
+
+
 async def async_setup_entry(
     hass: core.HomeAssistant, entry: config_entries.ConfigEntry
 ) -> bool:
     """Set up platform from a ConfigEntry."""
     hass.data.setdefault(DOMAIN, {})
+    coordinator = EnpalCoordinator(
+        hass, entry, _shared_session(hass), _snapshot_store(hass, entry.entry_id)
+    )
+    if await coordinator.async_load_snapshot():
+        # Sensors come from the last run's rows; fetch fresh values in the
+        # background instead of holding up startup on the Box.  Unloading
+        # the entry cancels it.
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} refresh {entry.entry_id}"
+        )
+    else:
+        # Prime the data so we know which sensors exist before registering.
+        # Raises ConfigEntryNotReady while the Box is unreachable, so Home
+        # Assistant retries the setup instead of loading without sensors.
+        await coordinator.async_config_entry_first_refresh()
+
     hass_data = dict(entry.data)
+    hass_data["coordinator"] = coordinator
     # Registers update listener to update config entry when options are updated.
     unsub_options_update_listener = entry.add_update_listener(options_update_listener)
     # Store a reference to the unsubscribe function to cleanup if an entry is unloaded.
@@ -47,10 +107,30 @@ async def async_unload_entry(
 
     # Remove config entry from domain.
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await entry_data["coordinator"].async_flush_snapshot()
+        # The HTTP session is shared by all entries; close it with the last.
+        if not any(key != "session" for key in hass.data[DOMAIN]):
+            await _async_close_session(hass)
 
     return unload_ok
 
+
+async def async_remove_entry(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry
+) -> None:
+    """Delete the stored /deviceMessages snapshot of a removed entry."""
+    # The coordinator's own store, so no pending save can write it back.
+    await _snapshot_store(hass, entry.entry_id).async_remove()
+    hass.data[_SNAPSHOT_STORES].pop(entry.entry_id, None)
+
+
 async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
     hass.data.setdefault(DOMAIN, {})
+
+    # Entries are not unloaded at shutdown; close the session ourselves.
+    async def _async_on_close(event: core.Event) -> None:
+        await _async_close_session(hass)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_on_close)
     return True
@@ -1,5 +1,7 @@
 """Config flow for IP check integration."""
 from __future__ import annotations
+import ipaddress
+import json
 import logging
 from typing import Any, Dict, Optional
 
@@ -8,9 +10,16 @@ import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import callback
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import DOMAIN
+from .sensor import REQUEST_TIMEOUT
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    json_loads = json.loads
 
 big_int = vol.All(vol.Coerce(int), vol.Range(min=300))
 
@@ -22,36 +31,44 @@ CONFIG_SCHEMA = vol.Schema(
             }
         )
 
-def validate_ipv4(s: str):
-    # IPv4 address is a string of 4 numbers separated by dots
-    a = s.split('.')
-    if len(a) != 4:
+def validate_ipv4(s: str) -> bool:
+    # IPv4 address is a string of 4 numbers separated by dots; ipaddress also
+    # rejects leading zeros ("01.2.3.4") and surrounding whitespace.
+    try:
+        ipaddress.IPv4Address(s)
+    except ValueError:
         return False
-    for x in a:
-        if not x.isdigit():
-            return False
-        i = int(x)
-        if i < 0 or i > 255:
-            return False
     return True
 
-async def get_health(ip: str):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'http://{ip}/health') as response:
-            return await response.json()
+async def get_health(session: aiohttp.ClientSession, ip: str):
+    async with session.get(f'http://{ip}/health', timeout=REQUEST_TIMEOUT) as response:
+        return json_loads(await response.read())
 
-async def validate_device_messages(ip: str) -> bool:
+async def validate_device_messages(session: aiohttp.ClientSession, ip: str) -> bool:
     """Check if the /deviceMessages endpoint contains the word 'power'."""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'http://{ip}/deviceMessages', timeout=10) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    return "power" in html.lower()
+        async with session.get(f'http://{ip}/deviceMessages', timeout=REQUEST_TIMEOUT) as response:
+            if response.status == 200:
+                # Stop reading as soon as the word shows up; keep the last
+                # few bytes so a match split across chunks is still found.
+                tail = b""
+                async for chunk in response.content.iter_chunked(4096):
+                    window = (tail + chunk).lower()
+                    if b"power" in window:
+                        return True
+                    tail = window[-4:]
     except Exception as e:
         _LOGGER.error(f"Error validating /deviceMessages for IP {ip}: {e}")
     return False
 
+async def _validate(hass: HomeAssistant, ip: str) -> Optional[str]:
+    """Return an error key for the form, or None if *ip* is a usable Enpal Box."""
+    if not validate_ipv4(ip):
+        return 'invalid_ip'
+    if not await validate_device_messages(async_get_clientsession(hass), ip):
+        return 'invalid_device_messages'
+    return None
+
 class CustomFlow(config_entries.ConfigFlow, domain=DOMAIN):
     data: Optional[Dict[str, Any]]
 
@@ -61,10 +78,9 @@ class CustomFlow(config_entries.ConfigFlow, domain=DOMAIN):
             self.data = user_input
             ip = self.data['enpal_host_ip']
 
-            if not validate_ipv4(ip):
-                errors['base'] = 'invalid_ip'
-            elif not await validate_device_messages(ip):
-                errors['base'] = 'invalid_device_messages'
+            error = await _validate(self.hass, ip)
+            if error:
+                errors['base'] = error
 
             if not errors:
                 return self.async_create_entry(title="Enpal", data=self.data)
@@ -91,10 +107,9 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             self.data = user_input
             ip = self.data['enpal_host_ip']
 
-            if not validate_ipv4(ip):
-                errors['base'] = 'invalid_ip'
-            elif not await validate_device_messages(ip):
-                errors['base'] = 'invalid_device_messages'
+            error = await _validate(self.hass, ip)
+            if error:
+                errors['base'] = error
 
             if not errors:
                 return self.async_create_entry(title="Enpal", data={'enpal_host_ip': ip})
@@ -1 +1,5 @@
-DOMAIN = "enpal"
\ No newline at end of file
+DOMAIN = "enpal"
+
+# Last parsed /deviceMessages per Config Entry, restored on startup.
+STORAGE_VERSION = 1
+STORAGE_KEY = DOMAIN + ".{entry_id}"
@@ -7,22 +7,37 @@ This version replaces the original InfluxDB approach.  It fetches
 
 Highlights
 ~~~~~~~~~~
-* **One network request per polling interval** – a shared `_EnpalData` helper
-  caches the last response. The cache Time‑To‑Live is always **½ of `SCAN_INTERVAL`**
+* **One network request per polling interval** – a shared `EnpalCoordinator`
+  fetches once and pushes the rows to every sensor.  Manual refreshes within
+  **½ of `SCAN_INTERVAL`** reuse the last response
 * **Testable without Home Assistant** – just run python3 sensor.py [IP]
 """
 from __future__ import annotations
 
 import asyncio
+import functools
+import hashlib
 import logging
 import re
 import sys
 from datetime import timedelta
+from html import unescape
 from time import monotonic
-from typing import Dict, Tuple, Optional
+from typing import Callable, Dict, FrozenSet, Iterable, List, Tuple, Optional, Union
 
 import aiohttp
-from bs4 import BeautifulSoup  # Add to manifest.json → "beautifulsoup4==4.12.3"
+
+# selectolax parses in C and is listed in manifest.json.  lxml is only a
+# fallback for stand‑alone runs where selectolax is not installed.
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:  # pragma: no cover
+    HTMLParser = None  # type: ignore[assignment,misc]
+    from lxml import etree, html as lxml_html
+
+    _ROWS_XPATH = etree.XPath("//tbody//tr")
+    # Same fixed encoding as the regex pass; lxml would assume Latin‑1.
+    _LXML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
 
 # Home‑Assistant imports are only present when running inside HA.  We guard
 # them so the file can still be executed stand‑alone for testing.
@@ -30,31 +45,42 @@ try:
     from homeassistant import config_entries
     from homeassistant.components.sensor import SensorEntity
     from homeassistant.const import CONF_HOST
-    from homeassistant.core import HomeAssistant
-    from homeassistant.helpers.entity_registry import (
-        async_entries_for_config_entry,
-        async_get,
-    )
+    from homeassistant.core import HomeAssistant, callback
     from homeassistant.config_entries import ConfigEntry
+    from homeassistant.helpers.storage import Store
     from homeassistant.helpers.typing import ConfigType
+    from homeassistant.helpers.update_coordinator import (
+        CoordinatorEntity,
+        DataUpdateCoordinator,
+        UpdateFailed,
+    )
 
     # Domain constant provided by ``custom_components.enpal.const``
     from custom_components.enpal.const import DOMAIN
 except ModuleNotFoundError:  # Stand‑alone mode (no Home Assistant environment)
     HomeAssistant = object  # type: ignore[misc,assignment]
-    config_entries = SensorEntity = async_entries_for_config_entry = async_get = CONF_HOST = DOMAIN = None  # type: ignore
+    config_entries = SensorEntity = CONF_HOST = DOMAIN = None  # type: ignore
 
 __all__ = [
+    "REQUEST_TIMEOUT",
     "SCAN_INTERVAL",
     "async_scrape_enpal",
+    "async_scrape_many",
+    "create_session",
     "scrape_enpal",
+    "scrape_many",
     # HA classes are exported only when inside HA
 ]
 
 _LOGGER = logging.getLogger(__name__)
 SCAN_INTERVAL = timedelta(seconds=60)
+# Manual refreshes within half an interval of a fetch reuse its result.
+_CACHE_TTL_SECONDS: float = SCAN_INTERVAL.total_seconds() * 0.5
 VERSION = "0.4.0"
 
+# Parsed cell value: ``float`` when the cell had a unit, text otherwise.
+_Value = Union[float, str]
+
 _UNIT_MAP: Dict[str, Tuple[Optional[str], str]] = {
     "W": ("power", "mdi:flash"),
     "kW": ("power", "mdi:flash"),
@@ -67,16 +93,54 @@ _UNIT_MAP: Dict[str, Tuple[Optional[str], str]] = {
     "°C": ("temperature", "mdi:thermometer"),
     "Minutes": (None, "mdi:timer-sand"),
 }
+# Units returned by ``_parse_value`` are interned too, so lookups (and the
+# many identical unit strings kept in the cache) share one object.
+_UNIT_MAP = {sys.intern(k): v for k, v in _UNIT_MAP.items()}
 
 # ---------------------------------------------------------------------------
 # Regular expressions for value parsing
 # ---------------------------------------------------------------------------
-_NUMBER_WITH_UNIT = re.compile(r"^\s*([-+]?\d+(?:\.\d+)?)\s*([^\d\s]+)?.*$")
-_NUMBER_IN_PAREN = re.compile(r"\(([-+]?\d+(?:\.\d+)?)\)\s*$")
+# One fused pattern, tried in priority order by a single ``match`` call:
+#   1. a trailing number in parentheses anywhere in the text (no capture)
+#   2. a leading number with an optional unit               → ``num``/``unit``
+# Only the groups are read, so the number branch stops right after the unit;
+# the multi‑line check it used to do with ``.*$`` is a plain ``in`` test.
+# Cells arrive stripped, so neither branch anchors on outer whitespace.
+_VALUE_RE = re.compile(
+    r"(?s:.*)\([-+]?\d+(?:\.\d+)?\)$"
+    r"|(?P<num>[-+]?\d+(?:\.\d+)?)\s*(?P<unit>[^\d\s]*)"
+)
+
+# Characters the units on an Enpal page are made of (never digits/spaces).
+_UNIT_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz%°/"
+
+class _SlugTable(dict):
+    """``str.translate`` table: keep ``[a-z0-9_]``, mark anything else ``\0``."""
+
+    def __missing__(self, code: int) -> str:
+        self[code] = "\0"
+        return "\0"
+
+
+# Row name → ``unique_id`` suffix, e.g. "Power.DC.Total" → "power_dc_total"
+_SLUG_TABLE = _SlugTable((ord(c), ord(c)) for c in "abcdefghijklmnopqrstuvwxyz0123456789_")
+
+
+@functools.lru_cache(maxsize=256)
+def _slugify(name: str) -> str:
+    """Return the ``unique_id`` suffix for a table row name (memoized).
+
+    Same result as ``re.sub(r"[^a-z0-9_]+", "_", ...)``: only runs of
+    replaced characters collapse, underscores already in the name are kept.
+    """
+    slug = name.strip().lower().translate(_SLUG_TABLE)
+    while "\0\0" in slug:
+        slug = slug.replace("\0\0", "\0")
+    return slug.replace("\0", "_")
 
 
-def _parse_value(text: str) -> Tuple[Optional[str], Optional[str]]:
-    """Parse a table‑cell string into ``(value, unit)``.
+def _parse_value(text: str) -> Tuple[Optional[_Value], Optional[str]]:
+    """Parse a stripped table‑cell string into ``(value, unit)``.
 
     Supported formats
     -----------------
@@ -86,142 +150,574 @@ def _parse_value(text: str) -> Tuple[Optional[str], Optional[str]]:
            "On‑grid mode (200)"   → ("On‑grid mode (200)", None)
            "Health (99)"          → ("Health (99)", None)
 
-    2. Number followed by an optional unit abbreviation.  Examples::
+    2. Number followed by an optional unit abbreviation.  With a unit the
+       number is returned as ``float``.  Examples::
+
+           "18.52kWh"   → (18.52, "kWh")
+           "2366.35 W"  → (2366.35, "W")
+           "42"         → ("42", None)
 
-           "18.52kWh"   → ("18.52", "kWh")
-           "2366.35 W"  → ("2366.35", "W")
+       Energy in ``Wh`` is normalised to ``kWh``::
+
+           "18520Wh"    → (18.52, "kWh")
 
     3. Non-numeric values (e.g., serial numbers). Examples::
 
            "SerialNumber: HV1110112411" → ("SerialNumber: HV1110112411", None)
+
+    The cell extractors strip the text once; it is not stripped again here.
     """
 
-    # Case 1 – (123) at the end of the string
-    paren_match = _NUMBER_IN_PAREN.search(text)
-    if paren_match:
-        # Return the full text if no unit is present
+    first = text[:1]
+    if not first:
+        # Fallback – nothing recognised
+        return None, None
+
+    # Case 3 short‑circuit – text that neither starts with a number nor
+    # contains a closing parenthesis can never match, skip the regex.
+    if ")" not in text and not (first.isdecimal() or first in "+-"):
         return text, None
 
-    # Case 2 – generic "number[ unit]" pattern
-    unit_match = _NUMBER_WITH_UNIT.match(text)
-    if unit_match:
-        numeric_str, unit_str = unit_match.groups()
-        return numeric_str, (unit_str or None)
+    # Case 2 fast path – strip the unit off the right end and check the rest
+    # is a plain number.  Anything unusual (a unit character outside
+    # ``_UNIT_CHARS``, every paren form, …) falls through to the regex.
+    if not text.endswith(")"):
+        head = text.rstrip(_UNIT_CHARS)
+        numeric_str = head.rstrip()
+        if _is_plain_number(numeric_str):
+            return _number_with_unit(numeric_str, text[len(head):] or None)
+
+    match = _VALUE_RE.match(text)
 
-    # Case 3 – fallback for non-numeric values
-    if text.strip():
+    # Case 1 – (123) at the end of the string: return the full text, no unit.
+    # Case 3 – no number at all: non-numeric value such as a serial number.
+    if match is None or match.group("num") is None:
         return text, None
 
-    # Fallback – nothing recognised
-    return None, None
+    # A number on the first of several lines is not a measurement.
+    if "\n" in text[match.end():-1]:
+        return text, None
+
+    # Case 2 – generic "number[ unit]" pattern
+    return _number_with_unit(match.group("num"), match.group("unit") or None)
+
+
+def _number_with_unit(
+    numeric_str: str, unit_str: Optional[str]
+) -> Tuple[Optional[_Value], Optional[str]]:
+    """Normalise a parsed ``(number, unit)`` pair (``Wh`` → ``kWh``, interning).
+
+    Measurements (numbers with a unit) are converted to ``float`` once here,
+    so sensors can use the cached value as is.
+    """
+    if unit_str is None:
+        return numeric_str, None
+    if unit_str == "Wh":
+        return float(_milli(numeric_str)), "kWh"
+    return float(numeric_str), sys.intern(unit_str)
+
+
+def _milli(numeric_str: str) -> str:
+    """Divide a plain decimal string by 1000 by moving the decimal point.
+
+    ``"18520"`` → ``"18.520"``, ``"18.52"`` → ``"0.01852"``.  Exact, unlike
+    ``float(x) / 1000`` which rounds twice.
+    """
+    sign = ""
+    if numeric_str[0] in "+-":
+        sign, numeric_str = numeric_str[0], numeric_str[1:]
+    int_part, _, frac = numeric_str.partition(".")
+    int_part = int_part.rjust(4, "0")
+    return f"{sign}{int_part[:-3]}.{int_part[-3:]}{frac}"
+
+
+def _is_plain_number(text: str) -> bool:
+    """``True`` for exactly ``[-+]?digits[.digits]`` (ASCII), like the regex."""
+    if text[:1] in ("+", "-"):
+        text = text[1:]
+    int_part, dot, frac = text.partition(".")
+    if not (int_part.isascii() and int_part.isdigit()):
+        return False
+    return not dot or (frac.isascii() and frac.isdigit())
+
+
+def _make_value_parser(units: Iterable[str]) -> Callable[[str], Tuple[Optional[_Value], Optional[str]]]:
+    """Build a :pyfunc:`_parse_value` specialised for the units a Box emits.
+
+    The set of units is small and fixed per installation, so after the first
+    poll the common ``"<number> <unit>"`` cell is split with ``endswith``
+    (longest unit first) instead of the regex.  Anything that does not fit
+    exactly is handed to :pyfunc:`_parse_value`, so results are identical.
+    """
+    suffixes = tuple(sorted({u for u in units if u}, key=len, reverse=True))
+
+    def parse_value(text: str) -> Tuple[Optional[_Value], Optional[str]]:
+        for unit in suffixes:
+            if text.endswith(unit):
+                numeric_str = text[: -len(unit)].rstrip()
+                if _is_plain_number(numeric_str):
+                    return _number_with_unit(numeric_str, unit)
+                break
+        return _parse_value(text)
+
+    return parse_value
 
 
 # ---------------------------------------------------------------------------
 # Pure HTML → dict parser (usable outside Home Assistant)
 # ---------------------------------------------------------------------------
 
-def _parse_device_messages_html(html: str) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
-    """Return ``{row_name: (value, unit)}`` from raw ``/deviceMessages`` HTML."""
-    soup = BeautifulSoup(html, "html.parser")
-    data: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
-    for table in soup.find_all("table"):
-        tbody = table.find("tbody")
-        if not tbody:
+# The Box renders a rigid ``<tr><td>name</td><td>value</td>…`` layout, so a
+# single pass over the raw markup finds every row without building a DOM.
+# Cell bodies may contain inline tags but never cross a ``<td>``/``<tr>``.
+# Like ``find_all("td")``, the first two ``<td>`` of a row count even when a
+# ``<th>``, comment or other markup sits before or between them.
+_CELL = r"<td\b[^>]*>([^<]*(?:<(?!/?t[dr]\b)[^<]*)*)</td>"
+_SKIP = r"[^<]*(?:<(?!td\b|/?tr\b)[^<]*)*"
+_ROW_RE = re.compile(r"<tr\b[^>]*>" + _SKIP + _CELL + _SKIP + _CELL, re.I)
+_TAG_RE = re.compile(r"<[^>]*>")
+
+
+# Only rows inside an explicit ``<tbody>`` count, as with the original
+# BeautifulSoup parser.  HTML5 parsers (lexbor) imply a ``<tbody>`` for every
+# table, so the scope is taken from the source markup instead of the DOM.
+_TBODY_TAG_RE = re.compile(r"<(/?)tbody\b[^>]*>", re.I)
+_TBODY_TAG_RE_BYTES = re.compile(_TBODY_TAG_RE.pattern.encode(), re.I)
+
+
+def _tbody_spans(markup: Union[str, bytes]) -> List[Tuple[int, int]]:
+    """``(start, end)`` of the content of every outermost explicit ``<tbody>``.
+
+    Nested ``<tbody>`` tags stay inside their outer span; an unclosed one runs
+    to the end of the markup.
+    """
+    tag_re = _TBODY_TAG_RE_BYTES if isinstance(markup, bytes) else _TBODY_TAG_RE
+    spans = []
+    depth = start = 0
+    for match in tag_re.finditer(markup):
+        if not match.group(1):
+            if not depth:
+                start = match.end()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if not depth:
+                spans.append((start, match.start()))
+    if depth:
+        spans.append((start, len(markup)))
+    return spans
+
+
+def _tbody_markup(markup: Union[str, bytes]) -> Union[str, bytes]:
+    """The explicit ``<tbody>`` contents only, each wrapped in its own table."""
+    if isinstance(markup, bytes):
+        head, tail = b"<table><tbody>", b"</tbody></table>"
+    else:
+        head, tail = "<table><tbody>", "</tbody></table>"
+    return markup[:0].join(
+        head + markup[start:end] + tail for start, end in _tbody_spans(markup)
+    )
+
+
+def _cell_text_regex(cell: str) -> str:
+    """Stripped text of a raw cell body, matching ``get_text(strip=True)``."""
+    if "<" in cell:
+        cell = "".join(piece.strip() for piece in _TAG_RE.split(cell))
+    if "&" in cell:
+        cell = unescape(cell)
+    return cell.strip()
+
+
+def _iter_cells_regex(html: str):
+    """Yield ``(name, raw_value)`` for every ``<tbody>`` row straight from the markup."""
+    for start, end in _tbody_spans(html):
+        for match in _ROW_RE.finditer(html, start, end):
+            name, raw_value = match.groups()
+            yield _cell_text_regex(name), _cell_text_regex(raw_value)
+
+
+def _cell_text_selectolax(td) -> str:
+    """Stripped cell text – flat ``<td>value</td>`` cells skip the deep walk."""
+    child = td.child
+    if child is not None and child.next is None:
+        return td.text(deep=False, strip=True) or td.text(strip=True)
+    return td.text(strip=True)
+
+
+def _iter_cells_selectolax(markup: Union[str, bytes]):
+    """Yield ``(name, raw_value)`` for every table row using selectolax."""
+    for tr in HTMLParser(markup).css("tbody tr"):
+        tds = tr.css("td")
+        if len(tds) < 2:
             continue
-        for tr in tbody.find_all("tr"):
-            tds = tr.find_all("td")
-            if len(tds) < 2:
-                continue
-            name = tds[0].get_text(strip=True)
-            raw_value = tds[1].get_text(strip=True)
-            value, unit = _parse_value(raw_value)
+        yield _cell_text_selectolax(tds[0]), _cell_text_selectolax(tds[1])
 
-            # Convert Wh to kWh if applicable
-            if unit == "Wh" and value is not None:
-                try:
-                    value = str(float(value) / 1000)
-                    unit = "kWh"
-                except ValueError:
-                    pass
 
-            # Skip empty values
-            if value is None:
-                continue
+def _cell_text_lxml(td) -> str:
+    """Stripped cell text – flat ``<td>value</td>`` cells skip ``itertext``."""
+    if not len(td):
+        return (td.text or "").strip()
+    return "".join(piece.strip() for piece in td.itertext())
+
 
-            data[name] = (value, unit)
+def _iter_cells_lxml(markup: Union[str, bytes]):
+    """Yield ``(name, raw_value)`` for every table row using lxml."""
+    for tr in _ROWS_XPATH(lxml_html.fromstring(markup, parser=_LXML_PARSER)):
+        # Only the first two cells matter; don't build a list of all of them.
+        tds = tr.iterchildren("td")
+        name_td = next(tds, None)
+        value_td = next(tds, None)
+        if value_td is None:
+            continue
+        yield _cell_text_lxml(name_td), _cell_text_lxml(value_td)
 
-    return data
 
+def _iter_parsed(cells, parse_value=_parse_value):
+    """Yield ``(row_name, (value, unit))`` for ``(name, raw_value)`` pairs."""
+    for name, raw_value in cells:
+        pair = parse_value(raw_value)
+        # Skip empty values
+        if pair[0] is not None:
+            yield name, pair
 
-async def async_scrape_enpal(ip: str) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
-    """**Async** helper – download and parse ``/deviceMessages`` from *ip*."""
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"http://{ip}/deviceMessages", timeout=15) as resp:
-            html = await resp.text()
-    return _parse_device_messages_html(html)
 
+def _rows_to_dict(
+    cells, parse_value=_parse_value
+) -> Dict[str, Tuple[Optional[_Value], Optional[str]]]:
+    """Turn ``(name, raw_value)`` pairs into ``{row_name: (value, unit)}``."""
+    return dict(_iter_parsed(cells, parse_value))
 
-def scrape_enpal(ip: str) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
-    """**Sync** wrapper around :pyfunc:`async_scrape_enpal` for quick CLI tests."""
-    return asyncio.run(async_scrape_enpal(ip))
+
+def _iter_cells_dom(markup: Union[str, bytes]):
+    """Fallback for markup that drifted away from the expected layout."""
+    markup = _tbody_markup(markup)
+    if not markup:
+        return iter(())
+    if HTMLParser is not None:
+        return _iter_cells_selectolax(markup)
+    return _iter_cells_lxml(markup)
+
+
+def _parse_device_messages_html(
+    html: Union[str, bytes]
+) -> Dict[str, Tuple[Optional[_Value], Optional[str]]]:
+    """Return ``{row_name: (value, unit)}`` from raw ``/deviceMessages`` HTML."""
+    if isinstance(html, bytes):
+        return _parse_device_messages_bytes(html)
+    return _rows_to_dict(_iter_cells_regex(html)) or _rows_to_dict(
+        _iter_cells_dom(html)
+    )
+
+
+def _iter_device_messages(raw: bytes, parse_value=_parse_value):
+    """Yield ``(row_name, (value, unit))`` straight from a response body.
+
+    The body is decoded once for the regex pass; the DOM fallback is handed
+    the original bytes so it does not need a decoded copy.
+    """
+    html = raw.decode("utf-8", "replace")
+    found = False
+    for row in _iter_parsed(_iter_cells_regex(html), parse_value):
+        found = True
+        yield row
+    if not found:
+        yield from _iter_parsed(_iter_cells_dom(raw), parse_value)
+
+
+def _parse_device_messages_bytes(
+    raw: bytes, parse_value=_parse_value
+) -> Dict[str, Tuple[Optional[_Value], Optional[str]]]:
+    """Same as :pyfunc:`_parse_device_messages_html`, straight from the body."""
+    return dict(_iter_device_messages(raw, parse_value))
+
+
+def _parse_into(
+    raw: bytes,
+    known_names: FrozenSet[str],
+    out: Dict[str, Tuple[Optional[_Value], Optional[str]]],
+    parse_value=_parse_value,
+) -> Dict[str, Tuple[Optional[_Value], Optional[str]]]:
+    """Update *out* in place with the rows in *known_names* only and return it.
+
+    Used once the sensors exist: rows nobody listens to are dropped by name
+    before their value is parsed.  Unchanged rows keep their tuple, and rows
+    that vanished from the page are removed.
+    """
+    seen = set()
+
+    def fill(cells) -> bool:
+        for name, raw_value in cells:
+            if name in known_names:
+                pair = parse_value(raw_value)
+                if pair[0] is not None:
+                    seen.add(name)
+                    if out.get(name) != pair:
+                        out[name] = pair
+        return bool(seen)
+
+    if not fill(_iter_cells_regex(raw.decode("utf-8", "replace"))):
+        fill(_iter_cells_dom(raw))
+    for name in out.keys() - seen:
+        del out[name]
+    return out
 
 
 # ---------------------------------------------------------------------------
-# Home‑Assistant specific implementation
+# HTTP session handling
 # ---------------------------------------------------------------------------
+# Inside Home Assistant all coordinators share one keep‑alive session, owned by
+# the integration's ``__init__``, so the TCP connections to the Boxes survive
+# between polls and entry reloads.  Stand‑alone helpers called without a
+# session open and close their own, so they work from any event loop, any
+# number of times.  Sessions from ``create_session`` carry the timeout.
+
+# Fail fast on a dead box instead of waiting for aiohttp's 5‑minute default.
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=3, sock_read=5)
+
+# The repetitive table markup compresses well; aiohttp inflates transparently.
+_HEADERS = {"Accept-Encoding": "gzip, deflate"}
+
+
+def create_session(limit: int = 2, keepalive_timeout: float = 15.0) -> aiohttp.ClientSession:
+    """Create a small session for talking to a single Enpal Box."""
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit,
+        ttl_dns_cache=300,
+        keepalive_timeout=keepalive_timeout,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT)
+
+
+async def _async_fetch(ip: str, session: aiohttp.ClientSession) -> bytes:
+    """Download the raw ``/deviceMessages`` body from *ip*."""
+    async with session.get(f"http://{ip}/deviceMessages", headers=_HEADERS) as resp:
+        return await resp.read()
+
+
+async def async_scrape_enpal(
+    ip: str, session: Optional[aiohttp.ClientSession] = None
+) -> Dict[str, Tuple[Optional[_Value], Optional[str]]]:
+    """**Async** helper – download and parse ``/deviceMessages`` from *ip*."""
+    if session is None:
+        async with create_session() as session:
+            return await async_scrape_enpal(ip, session)
+    return _parse_device_messages_bytes(await _async_fetch(ip, session))
+
+
+async def async_scrape_many(
+    ips: Iterable[str], session: Optional[aiohttp.ClientSession] = None
+) -> Dict[str, Union[Dict[str, Tuple[Optional[_Value], Optional[str]]], BaseException]]:
+    """**Async** helper – scrape several Boxes concurrently over one session.
+
+    Failures are returned in place of the result for that IP.
+    """
+    if session is None:
+        async with create_session() as session:
+            return await async_scrape_many(ips, session)
+    ips = list(ips)
+    results = await asyncio.gather(
+        *(async_scrape_enpal(ip, session) for ip in ips), return_exceptions=True
+    )
+    return dict(zip(ips, results))
 
-class _EnpalData:
-    """Shared fetch‑and‑cache manager.  One instance per Config Entry."""
-
-    def __init__(self, hass: HomeAssistant, ip: str) -> None:
-        self._hass = hass
-        self._ip = ip
-        self._cache: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
-        self._last_fetch: float = 0.0  # monotonic time
-        self._ttl = int(SCAN_INTERVAL.total_seconds() / 2)  # half interval
-        self._lock = asyncio.Lock()
-
-    @property
-    def data(self) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
-        return self._cache
-
-    # ---------------------------------------------------------------------
-    # Home Assistant calls `async_update` on **every** entity, but we only
-    # hit the Enpal Box once because of the TTL + lock.
-    # ---------------------------------------------------------------------
-    async def async_update(self) -> None:
-        """Fetch new data if the cache expired."""
-        now = monotonic()
-        if self._cache and now - self._last_fetch < self._ttl:
-            return  # fresh
-
-        async with self._lock:
-            # Another coroutine may already have refreshed the cache while we
-            # were waiting for the lock – check again.
-            now = monotonic()
-            if self._cache and now - self._last_fetch < self._ttl:
-                return
-            self._last_fetch = monotonic()
 
+async def _async_dump(ips: Iterable[str]) -> None:
+    """Write rows to stdout as they are parsed – no dict, no sorting."""
+    ips = list(ips)
+    write = sys.stdout.write
+    async with create_session() as session:
+        for ip in ips:
+            if len(ips) > 1:
+                write(f"== {ip} ==\n")
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        f"http://{self._ip}/deviceMessages", timeout=15
-                    ) as resp:
-                        html = await resp.text()
-            except Exception as exc:
-                _LOGGER.warning("Enpal fetch failed: %s", exc)
-                return
+                raw = await _async_fetch(ip, session)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                write(f"Error: {exc!r}\n")
+                continue
+            for name, (val, unit) in _iter_device_messages(raw):
+                write(f"{name:40s} : {val} {unit or ''}\n")
+
+
+def _run_standalone(coro):
+    """Run *coro* on a fresh event loop (the helpers close their session)."""
+    return asyncio.run(coro)
+
+
+def scrape_enpal(ip: str) -> Dict[str, Tuple[Optional[_Value], Optional[str]]]:
+    """**Sync** wrapper around :pyfunc:`async_scrape_enpal` for quick CLI tests."""
+    return _run_standalone(async_scrape_enpal(ip))
 
-            self._cache = _parse_device_messages_html(html)
 
+def scrape_many(
+    ips: Iterable[str],
+) -> Dict[str, Union[Dict[str, Tuple[Optional[_Value], Optional[str]]], BaseException]]:
+    """**Sync** wrapper around :pyfunc:`async_scrape_many` – one loop for all IPs."""
+    return _run_standalone(async_scrape_many(ips))
 
 
 # ---------------------------------------------------------------------------
-# Skip the Home‑Assistant parts when running this file directly for testing.
+# Home‑Assistant specific implementation
+# (skipped when running this file directly for testing)
 # ---------------------------------------------------------------------------
 if HomeAssistant is not object:
 
+    # Seconds between snapshot writes; the store also flushes on shutdown.
+    _SNAPSHOT_SAVE_DELAY = 600
+
+    class EnpalCoordinator(
+        DataUpdateCoordinator[Dict[str, Tuple[Optional[_Value], Optional[str]]]]
+    ):
+        """Fetch ``/deviceMessages`` once per interval.  One per Config Entry."""
+
+        def __init__(
+            self,
+            hass: HomeAssistant,
+            entry: ConfigEntry,
+            session: aiohttp.ClientSession,
+            store: Store,
+        ) -> None:
+            super().__init__(
+                hass,
+                _LOGGER,
+                config_entry=entry,
+                name=DOMAIN,
+                update_interval=SCAN_INTERVAL,
+            )
+            self._ip: str = entry.data["enpal_host_ip"]
+            # The integration‑wide session; its owner closes it, not us.
+            self._session = session
+            # monotonic() deadline until which the last result is reused.
+            self._next_fetch_at: float = 0.0
+            # Validators of the last response for conditional GETs.
+            self._etag: Optional[str] = None
+            self._last_modified: Optional[str] = None
+            # Digest of the last parsed body, for Boxes without validators.
+            self._body_hash: Optional[bytes] = None
+            # Replaced by a parser specialised for this Box after the first poll.
+            self._parse_value = _parse_value
+            self._refresh_task: Optional[asyncio.Task] = None
+            # Rows that got a sensor; later polls parse only these.
+            self._known_names: Optional[FrozenSet[str]] = None
+            # Last‑known‑good data on disk, so a restart starts from it.
+            self._store = store
+            self._save_pending = False
+
+        async def async_load_snapshot(self) -> bool:
+            """Seed ``data`` from the stored snapshot; ``True`` if there was one.
+
+            The fetch deadline is left at zero, so the next refresh still goes
+            to the Box.
+            """
+            snapshot = await self._store.async_load()
+            if not isinstance(snapshot, dict) or not snapshot:
+                return False
+            # JSON turned the ``(value, unit)`` tuples into lists.
+            self.data = {name: tuple(pair) for name, pair in snapshot.items()}
+            return True
+
+        async def async_flush_snapshot(self) -> None:
+            """Stop polling and write a pending snapshot now (on unload)."""
+            await self.async_shutdown()
+            if self._save_pending:
+                # async_save() also drops the armed delay and shutdown writes.
+                await self._store.async_save(self._snapshot())
+
+        @callback
+        def _snapshot(self) -> Dict[str, Tuple[Optional[_Value], Optional[str]]]:
+            """Data to write; called by the store when the delayed save runs."""
+            self._save_pending = False
+            return dict(self.data or {})
+
+        async def _async_update_data(
+            self,
+        ) -> Dict[str, Tuple[Optional[_Value], Optional[str]]]:
+            """Download and parse ``/deviceMessages``."""
+            # Manual refreshes (``homeassistant.update_entity``) shortly after
+            # a poll reuse the last result instead of hitting the Box again.
+            if self.data and monotonic() < self._next_fetch_at:
+                return self.data
+
+            # Concurrent refreshes share one in‑flight fetch instead of each
+            # hitting the Box; shield() keeps it alive if one caller cancels.
+            # It is an entry background task, so unloading the entry cancels it.
+            task = self._refresh_task
+            if task is None or task.done():
+                task = self.config_entry.async_create_background_task(
+                    self.hass, self._async_fetch(), f"{DOMAIN} fetch {self._ip}"
+                )
+                task.add_done_callback(self._consume_result)
+                self._refresh_task = task
+            return await asyncio.shield(task)
+
+        @staticmethod
+        def _consume_result(task: asyncio.Task) -> None:
+            """Retrieve a failure even when every waiter was cancelled."""
+            if not task.cancelled():
+                task.exception()
+
+        async def _async_fetch(
+            self,
+        ) -> Dict[str, Tuple[Optional[_Value], Optional[str]]]:
+            """Fetch and parse once; awaited by every pending refresh."""
+            try:
+                headers = dict(_HEADERS)
+                # Validators only make sense while we still hold their body.
+                if self.data:
+                    if self._etag:
+                        headers["If-None-Match"] = self._etag
+                    if self._last_modified:
+                        headers["If-Modified-Since"] = self._last_modified
+                try:
+                    async with self._session.get(
+                        f"http://{self._ip}/deviceMessages",
+                        headers=headers,
+                    ) as resp:
+                        if resp.status == 304 and self.data:
+                            self._next_fetch_at = monotonic() + _CACHE_TTL_SECONDS
+                            return self.data  # unchanged – skip the parse
+                        if resp.status != 200:
+                            raise UpdateFailed(
+                                f"Enpal fetch failed: HTTP {resp.status}"
+                            )
+                        etag = resp.headers.get("ETag")
+                        last_modified = resp.headers.get("Last-Modified")
+                        raw = await resp.read()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                    raise UpdateFailed(f"Enpal fetch failed: {exc}") from exc
+
+                self._next_fetch_at = monotonic() + _CACHE_TTL_SECONDS
+                body_hash = hashlib.blake2b(raw, digest_size=16).digest()
+                if body_hash == self._body_hash and self.data:
+                    # Same bytes as last time – skip the parse.
+                    self._etag, self._last_modified = etag, last_modified
+                    return self.data
+                self._body_hash = body_hash
+                if self._known_names:
+                    # Steady state: update the previous dict in place.  The
+                    # coordinator still notifies listeners (always_update).
+                    data = _parse_into(
+                        raw, self._known_names, self.data or {}, self._parse_value
+                    )
+                else:
+                    data = _parse_device_messages_bytes(raw, self._parse_value)
+                    if data:
+                        self._known_names = frozenset(data)
+                        self._parse_value = _make_value_parser(
+                            unit for _, unit in data.values()
+                        )
+                # Remember the validators only for a body that was parsed.
+                self._etag, self._last_modified = etag, last_modified
+                if data and not self._save_pending:
+                    # At most one write per delay (and one on shutdown); the
+                    # snapshot is taken when the write actually happens.
+                    self._save_pending = True
+                    self._store.async_delay_save(self._snapshot, _SNAPSHOT_SAVE_DELAY)
+                return data
+            finally:
+                self._refresh_task = None
+
+
     async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
         """Called by Home Assistant when the Config Entry is added / reloaded.
 
@@ -229,48 +725,46 @@ if HomeAssistant is not object:
         currently present in the HTML.  When `/deviceMessages` adds new rows
         you need to reload the integration (or restart HA) to pick them up –
         matching the behaviour of the original InfluxDB version.
-        """
-        ip: str = entry.data["enpal_host_ip"]
 
-        fetcher = _EnpalData(hass, ip)
-        # Prime the cache so we know which sensors exist before registering
-        await fetcher.async_update()
+        The coordinator was created and primed by the integration's
+        ``async_setup_entry`` before the platform is forwarded.
+        """
+        coordinator: EnpalCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
 
         sensors = []
-        for row_name, (_, unit) in fetcher.data.items():
+        for row_name, (_, unit) in (coordinator.data or {}).items():
             device_class, default_icon = _UNIT_MAP.get(unit, (None, "mdi:gauge"))
             sensors.append(
-                EnpalSensor(row_name, unit, device_class, default_icon, fetcher)
+                EnpalSensor(coordinator, row_name, unit, device_class, default_icon)
             )
 
-        async_add_entities(sensors, update_before_add=True)
+        async_add_entities(sensors)
 
 
-    class EnpalSensor(SensorEntity):
+    class EnpalSensor(CoordinatorEntity[EnpalCoordinator], SensorEntity):
         """Home‑Assistant entity matching a single row from `/deviceMessages`."""
 
         def __init__(
             self,
+            coordinator: EnpalCoordinator,
             row_name: str,
             unit: Optional[str],
             device_class: Optional[str],
             icon: str,
-            fetcher: _EnpalData,
         ) -> None:
+            super().__init__(coordinator)
             self._row_name = row_name
             self._unit = unit
-            self._fetcher = fetcher
 
             # Derive a safe unique_id and entity_id suffix
-            slug = re.sub(r"[^a-z0-9_]+", "_", row_name.strip().lower())
-            self._attr_unique_id = f"enpal_{slug}"
+            self._attr_unique_id = f"enpal_{_slugify(row_name)}"
             self._attr_name = f"Enpal {row_name}"
             self._attr_icon = icon
             self._attr_device_class = device_class
             self._attr_native_unit_of_measurement = unit
 
             # Check if value for this sensor is numeric by trying to convert it to float
-            value, _ = self._fetcher.data.get(self._row_name, (None, self._unit))
+            value, _ = coordinator.data.get(self._row_name, (None, self._unit))
             if value is not None:
                 try:
                     float(value)
@@ -286,45 +780,50 @@ if HomeAssistant is not object:
             if unit == "kWh" and id_lower.__contains__("energy") and id_lower.__contains__("total"):
                 self._attr_state_class = "total_increasing"
 
+            self._attr_native_value = self._current_value()
+            self._was_available = coordinator.last_update_success
 
-        async def async_update(self) -> None:
-            """Home Assistant schedules this approximately every SCAN_INTERVAL."""
-            await self._fetcher.async_update()
-            value, unit = self._fetcher.data.get(self._row_name, (None, self._unit))
+        @callback
+        def _handle_coordinator_update(self) -> None:
+            """Called by the coordinator after every fetch.
 
-            # Don't update the value if it's already the same.
-            if self._attr_native_value == value:
+            Rows that did not change since the last poll skip the state write,
+            so a poll only touches the state machine for the values that moved.
+            """
+            value = self._current_value()
+            available = self.coordinator.last_update_success
+            if value == self._attr_native_value and available == self._was_available:
                 return
+            self._attr_native_value = value
+            self._was_available = available
+            super()._handle_coordinator_update()
 
-            # Determine if the value should be a float or remain a string
-            if unit and value is not None:
-                try:
-                    self._attr_native_value = float(value)
-                except ValueError:
-                    # Handle non-numeric values gracefully
-                    # If value have a line break, remove it, use only first line
-                    if "\n" in value:
-                        value = value.split("\n")[0]
-                    # If value is a string longer than 200 characters, truncate it
-                    if len(value) > 200:
-                        value = value[:200]
-                    self._attr_native_value = value
-                    self._attr_device_class = None  # Clear device class for non-numeric values
-                    self._attr_state_class = None  # Clear state class for non-numeric values
-                    self._attr_native_unit_of_measurement = None
-            else:
-                self._attr_native_value = value
+        def _current_value(self) -> Optional[_Value]:
+            # Measurements are cached as floats and text as str – no conversion.
+            return self.coordinator.data.get(self._row_name, (None,))[0]
 
 
 # ---------------------------------------------------------------------------
 # Optional command‑line interface
 # ---------------------------------------------------------------------------
-if __name__ == "__main__":  # Run "python sensor.py <ip>" for a quick test
-    if len(sys.argv) != 2:
-        print("Usage: python sensor.py <enpax-box-ip>")
+if __name__ == "__main__":  # Run "python sensor.py <ip> [<ip> ...]" for a quick test
+    args = sys.argv[1:]
+    stream = "--stream" in args
+    ip_args = [arg for arg in args if arg != "--stream"]
+    if not ip_args:
+        print("Usage: python sensor.py [--stream] <enpax-box-ip> [<enpax-box-ip> ...]")
         sys.exit(1)
 
-    ip_arg = sys.argv[1]
-    results = scrape_enpal(ip_arg)
-    for key, (val, unit) in sorted(results.items()):
-        print(f"{key:40s} : {val} {unit or ''}")
+    if stream:
+        # Rows in page order, printed while parsing.
+        _run_standalone(_async_dump(ip_args))
+        sys.exit(0)
+
+    for ip_arg, results in scrape_many(ip_args).items():
+        if len(ip_args) > 1:
+            print(f"== {ip_arg} ==")
+        if isinstance(results, BaseException):
+            print(f"Error: {results!r}")
+            continue
+        for key, (val, unit) in sorted(results.items()):
+            print(f"{key:40s} : {val} {unit or ''}")
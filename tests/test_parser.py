@@ -0,0 +1,182 @@
+"""Parser equivalence checks for ``custom_components/enpal/sensor.py``.
+
+The fast paths in the sensor module (row regex, value fast paths, the
+per‑Box specialised parser) all promise the same results as the original
+BeautifulSoup + regex implementation.  These tests hold them to it.
+"""
+import importlib.util
+import random
+import re
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pytest
+
+SENSOR_PY = Path(__file__).parents[1] / "custom_components" / "enpal" / "sensor.py"
+FIXTURE = Path(__file__).parent / "fixtures" / "device_messages.html"
+
+
+def _load_sensor(name: str, without_selectolax: bool = False):
+    """Import ``sensor.py`` stand‑alone, optionally forcing the lxml fallback."""
+    blocked = {}
+    if without_selectolax:
+        for mod in ("selectolax", "selectolax.lexbor"):
+            blocked[mod] = sys.modules.get(mod)
+            sys.modules[mod] = None  # makes the import raise ImportError
+    try:
+        spec = importlib.util.spec_from_file_location(name, SENSOR_PY)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        for mod, previous in blocked.items():
+            if previous is None:
+                sys.modules.pop(mod, None)
+            else:
+                sys.modules[mod] = previous
+    return module
+
+
+sensor = _load_sensor("enpal_sensor")
+
+
+@pytest.fixture(scope="module")
+def raw() -> bytes:
+    return FIXTURE.read_bytes()
+
+
+# ---------------------------------------------------------------------------
+# Reference: the value parser the integration shipped with
+# ---------------------------------------------------------------------------
+_NUMBER_WITH_UNIT = re.compile(r"^\s*([-+]?\d+(?:\.\d+)?)\s*([^\d\s]+)?.*$")
+_NUMBER_IN_PAREN = re.compile(r"\(([-+]?\d+(?:\.\d+)?)\)\s*$")
+
+
+def _reference_parse_value(text: str) -> Tuple[Optional[object], Optional[str]]:
+    if _NUMBER_IN_PAREN.search(text):
+        return text, None
+    match = _NUMBER_WITH_UNIT.match(text)
+    if match:
+        numeric_str, unit_str = match.groups()
+        if unit_str == "Wh":
+            return float(numeric_str) / 1000, "kWh"
+        if unit_str:
+            return float(numeric_str), unit_str
+        return numeric_str, None
+    if text.strip():
+        return text, None
+    return None, None
+
+
+def _same(ours, reference) -> bool:
+    # ``Wh`` is shifted exactly now; the reference divides a float.
+    if ours[1] == "kWh" and reference[1] == "kWh":
+        return ours[0] == pytest.approx(reference[0], rel=1e-15)
+    return ours == reference
+
+
+# ---------------------------------------------------------------------------
+# Row extraction
+# ---------------------------------------------------------------------------
+def test_backends_return_the_same_rows(raw):
+    regex_rows = list(sensor._iter_cells_regex(raw.decode("utf-8")))
+    assert regex_rows
+    if sensor.HTMLParser is not None:
+        assert list(sensor._iter_cells_dom(raw)) == regex_rows
+    lxml_sensor = _load_sensor("enpal_sensor_lxml", without_selectolax=True)
+    assert lxml_sensor.HTMLParser is None
+    assert list(lxml_sensor._iter_cells_dom(raw)) == regex_rows
+
+
+def test_rows_outside_tbody_are_skipped(raw):
+    names = [name for name, _ in sensor._iter_cells_regex(raw.decode("utf-8"))]
+    assert "Second.Table.Current" in names
+    assert "Outside.Tbody" not in names
+    assert all(name != "Outside.Tbody" for name, _ in sensor._iter_cells_dom(raw))
+
+
+def test_rows_with_th_or_comments_are_kept(raw):
+    data = sensor._parse_device_messages_bytes(raw)
+    assert data["Th.First"] == (1.0, "W")
+    assert data["Comment.First"] == (3.0, "W")
+    assert data["Th.Between"] == (5.0, "W")
+
+
+def test_page_matches_reference_parser(raw):
+    expected = {}
+    for name, raw_value in sensor._iter_cells_regex(raw.decode("utf-8")):
+        pair = _reference_parse_value(raw_value)
+        if pair[0] is not None:
+            expected[name] = pair
+    data = sensor._parse_device_messages_bytes(raw)
+    assert data.keys() == expected.keys()
+    for name, pair in data.items():
+        assert _same(pair, expected[name]), name
+    assert data["Energy.Production.Total.Day"] == (18.52, "kWh")
+    assert data["Inverter.System.State"] == ("On-grid mode (200)", None)
+
+
+def test_parse_into_keeps_known_rows_only(raw):
+    full = sensor._parse_device_messages_bytes(raw)
+    known = frozenset(list(full)[::2])
+    out = {"Gone": (1.0, "W")}
+    assert sensor._parse_into(raw, known, out) is out
+    assert out == {name: pair for name, pair in full.items() if name in known}
+
+
+# ---------------------------------------------------------------------------
+# Value parsing
+# ---------------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("On‑grid mode (200)", ("On‑grid mode (200)", None)),
+        ("Health (99)", ("Health (99)", None)),
+        ("18.52kWh", (18.52, "kWh")),
+        ("2366.35 W", (2366.35, "W")),
+        ("42", ("42", None)),
+        ("18520Wh", (18.52, "kWh")),
+        ("-1200.5 Wh", (-1.2005, "kWh")),
+        ("SerialNumber: HV1110112411", ("SerialNumber: HV1110112411", None)),
+        ("5 modes (200)", ("5 modes (200)", None)),
+        ("12 W\nfoo", ("12 W\nfoo", None)),
+        ("", (None, None)),
+    ],
+)
+def test_parse_value_examples(text, expected):
+    assert sensor._parse_value(text) == expected
+
+
+_ALPHABET = list("0123456789 .+-()WkhVA%°CMinutes\nabcN٣x/\x1c\xa0\t")
+_UNIT_SETS = [
+    ["W", "kWh", "V", "A", "%", "°C", "Minutes", "Hz", "kW"],
+    ["W"],
+    ["h", "Wh", "-W", "xW"],
+    ["kWh", "s", ")", "W)"],
+]
+
+
+def _random_cells(count: int):
+    rng = random.Random(1)
+    units = sum(_UNIT_SETS, [])
+    for _ in range(count):
+        if rng.random() < 0.3:
+            number = rng.choice(["1", "-2.5", "+3", "007", "1.", ".5"])
+            text = number + rng.choice(["", " "]) + rng.choice(units)
+        else:
+            text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 10)))
+        # Cells reach the value parser stripped by the extractors.
+        yield text.strip()
+
+
+def test_parse_value_matches_reference():
+    for text in _random_cells(20000):
+        assert _same(sensor._parse_value(text), _reference_parse_value(text)), text
+
+
+def test_specialised_parsers_match_generic():
+    parsers = [sensor._make_value_parser(units) for units in _UNIT_SETS]
+    for text in _random_cells(20000):
+        expected = sensor._parse_value(text)
+        for parse_value in parsers:
+            assert parse_value(text) == expected, text